@@ -1,13 +1,8 @@
 import os
 import aws_cdk as cdk
-from dotenv import load_dotenv
+from infrastructure._env import load_once
 
-load_dotenv() 
-
-from infrastructure.stacks.ingress import IngressStack
-from infrastructure.stacks.workflow import WorkflowStack
-from infrastructure.stacks.delivery import DeliveryStack
-from infrastructure.stacks.observability import ObservabilityStack
+load_once()
 
 app = cdk.App()
 
@@ -17,17 +12,54 @@ env = cdk.Environment(
     region=os.getenv('CDK_DEFAULT_REGION')
 )
 
-ingress_stack = IngressStack(app, "TravelAgentIngressStack", env=env)
+# Stack selection: `cdk synth -c stacks=TravelAgentWorkflowStack` only builds the
+# requested stacks (plus whatever they reference). No context = build everything.
+INGRESS = "TravelAgentIngressStack"
+WORKFLOW = "TravelAgentWorkflowStack"
+DELIVERY = "TravelAgentDeliveryStack"
+OBSERVABILITY = "TravelAgentObservabilityStack"
 
-workflow_stack = WorkflowStack(app, "TravelAgentWorkflowStack",
-    bus=ingress_stack.bus,
-    env=env
-)
-DeliveryStack(app, "TravelAgentDeliveryStack", env=env)
+# Cross-stack references: a stack can't be built without the stacks it reads from
+STACK_DEPENDENCIES = {
+    WORKFLOW: [INGRESS],
+    OBSERVABILITY: [WORKFLOW],
+}
 
-observability_stack = ObservabilityStack(app, "TravelAgentObservabilityStack", 
-    workflow_stack=workflow_stack,
-    env=env
-)
+def resolve_stacks(requested):
+    if not requested:
+        return {INGRESS, WORKFLOW, DELIVERY, OBSERVABILITY}
+    selected = set()
+    pending = [name.strip() for name in requested.split(",") if name.strip()]
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(STACK_DEPENDENCIES.get(name, []))
+    return selected
+
+selected = resolve_stacks(app.node.try_get_context("stacks"))
+
+# Stack modules are imported lazily so unselected stacks cost nothing at synth time
+if INGRESS in selected:
+    from infrastructure.stacks.ingress import IngressStack
+    ingress_stack = IngressStack(app, INGRESS, env=env)
+
+if WORKFLOW in selected:
+    from infrastructure.stacks.workflow import WorkflowStack
+    workflow_stack = WorkflowStack(app, WORKFLOW,
+        bus=ingress_stack.bus,
+        env=env
+    )
+
+if DELIVERY in selected:
+    from infrastructure.stacks.delivery import DeliveryStack
+    DeliveryStack(app, DELIVERY, env=env)
+
+if OBSERVABILITY in selected:
+    from infrastructure.stacks.observability import ObservabilityStack
+    observability_stack = ObservabilityStack(app, OBSERVABILITY,
+        workflow_stack=workflow_stack,
+        env=env
+    )
 
 app.synth()
@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+# Synthesize once, then diff and deploy from the cloud assembly so the app
+# is not re-run for every command. Extra args are passed to cdk deploy
+# (e.g. ./deploy.sh TravelAgentWorkflowStack); with none, every stack is deployed.
+set -euo pipefail
+
+cdk synth -o cdk.out
+cdk --app cdk.out diff "$@"
+cdk --app cdk.out deploy --require-approval never "${@:---all}"
@@ -0,0 +1,10 @@
+# Files under lambda/ that never need to ship with a function
+ASSET_EXCLUDES = [
+    "**/__pycache__",
+    "**/*.pyc",
+    "**/.pytest_cache",
+    "**/tests",
+    "**/.venv",
+    "**/*.dist-info",
+    "**/*.egg-info",
+]
@@ -0,0 +1,20 @@
+import os
+from pathlib import Path
+
+SENTINEL = "TRAVEL_AGENT_ENV_LOADED"
+
+def load_once(path=".env"):
+    """Load KEY=VALUE pairs from a .env file into os.environ (existing vars win)."""
+    if os.environ.get(SENTINEL):
+        return
+
+    env_file = Path(path)
+    if env_file.is_file():
+        for line in env_file.read_text().splitlines():
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            os.environ.setdefault(key.strip(), value.strip().strip("'\""))
+
+    os.environ[SENTINEL] = "1"
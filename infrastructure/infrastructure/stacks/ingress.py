@@ -1,17 +1,14 @@
 from aws_cdk import (
     Stack,
     CfnOutput,
-    aws_dynamodb as dynamodb,
     aws_lambda as lambda_,
     aws_iam as iam,
     aws_apigateway as apigateway,
     aws_events as events,
-    aws_events_targets as targets,
-    aws_sqs as sqs,
     Duration,
-    RemovalPolicy,
 )
 from constructs import Construct
+from infrastructure._assets import ASSET_EXCLUDES
 
 class IngressStack(Stack):
 
@@ -35,15 +32,21 @@ class IngressStack(Stack):
         )
         # Grant PutEvents on our custom bus
         self.bus.grant_put_events_to(intake_role)
+        # DescribeEventBus is the init-time call that pre-opens the connection
+        intake_role.add_to_policy(iam.PolicyStatement(
+            actions=["events:DescribeEventBus"],
+            resources=[self.bus.event_bus_arn],
+        ))
 
         self.intake_lambda = lambda_.Function(
             self, "IntakeLambda",
             function_name="travel-agent-intake",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,
             handler="intake.handler.lambda_handler", 
-            code=lambda_.Code.from_asset("lambda"),
+            code=lambda_.Code.from_asset("lambda", exclude=ASSET_EXCLUDES),
             timeout=Duration.seconds(10), 
-            memory_size=128,
+            memory_size=256,
             role=intake_role,
             environment={
                 "EVENT_BUS_NAME": self.bus.event_bus_name,
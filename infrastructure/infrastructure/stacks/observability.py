@@ -16,28 +16,23 @@ class ObservabilityStack(Stack):
             dashboard_name="TravelAgent-Overview"
         )
         
+        period = Duration.minutes(5)
+
         # 1. Step Functions Metrics (Manual Metric creation for reliability)
-        sfn_executions_started = cw.Metric(
-            namespace="AWS/States",
-            metric_name="ExecutionsStarted",
-            dimensions_map={"StateMachineArn": workflow_stack.state_machine.state_machine_arn},
-            period=Duration.minutes(5),
-            statistic="Sum"
-        )
-        sfn_executions_succeeded = cw.Metric(
-            namespace="AWS/States",
-            metric_name="ExecutionsSucceeded",
-            dimensions_map={"StateMachineArn": workflow_stack.state_machine.state_machine_arn},
-            period=Duration.minutes(5),
-            statistic="Sum"
-        )
-        sfn_executions_failed = cw.Metric(
-            namespace="AWS/States",
-            metric_name="ExecutionsFailed",
-            dimensions_map={"StateMachineArn": workflow_stack.state_machine.state_machine_arn},
-            period=Duration.minutes(5),
-            statistic="Sum"
-        )
+        state_machine_arn = workflow_stack.state_machine.state_machine_arn
+
+        def sfn_metric(metric_name):
+            return cw.Metric(
+                namespace="AWS/States",
+                metric_name=metric_name,
+                dimensions_map={"StateMachineArn": state_machine_arn},
+                period=period,
+                statistic="Sum"
+            )
+
+        sfn_executions_started = sfn_metric("ExecutionsStarted")
+        sfn_executions_succeeded = sfn_metric("ExecutionsSucceeded")
+        sfn_executions_failed = sfn_metric("ExecutionsFailed")
         
         sfn_widget = cw.GraphWidget(
             title="Workflow Executions",
@@ -47,8 +42,8 @@ class ObservabilityStack(Stack):
         
         # 2. Broker Lambda Errors & Invocations
         # Use metric_invocations helpers if available on Function, or manual too
-        broker_invocations = workflow_stack.broker_lambda.metric_invocations(period=Duration.minutes(5))
-        broker_errors = workflow_stack.broker_lambda.metric_errors(period=Duration.minutes(5))
+        broker_invocations = workflow_stack.broker_lambda.metric_invocations(period=period)
+        broker_errors = workflow_stack.broker_lambda.metric_errors(period=period)
         
         broker_widget = cw.GraphWidget(
             title="Broker Lambda Activity",
@@ -58,15 +53,26 @@ class ObservabilityStack(Stack):
         )
         
         # 3. Agent Lambda Errors (Aggregate View)
-        # We can't easily aggregate unless we use math expressions, let's just show key agents
-        flight_errors = workflow_stack.flight_lambda.metric_errors(period=Duration.minutes(5), label="Flight Errors")
-        hotel_errors = workflow_stack.hotel_lambda.metric_errors(period=Duration.minutes(5), label="Hotel Errors")
-        synthesis_errors = workflow_stack.synthesis_lambda.metric_errors(period=Duration.minutes(5), label="Synthesis Errors")
-        delivery_errors = workflow_stack.delivery_lambda.metric_errors(period=Duration.minutes(5), label="Delivery Errors")
+        # One math expression summed server-side instead of a line per agent
+        agent_errors = {
+            f"e{i}": function.metric_errors(period=period, label=f"{name} Errors")
+            for i, (name, function) in enumerate([
+                ("Flight", workflow_stack.flight_lambda),
+                ("Research", workflow_stack.research_lambda),
+                ("Synthesis", workflow_stack.synthesis_lambda),
+                ("Delivery", workflow_stack.delivery_lambda),
+            ])
+        }
+        total_agent_errors = cw.MathExpression(
+            expression=f"SUM([{','.join(agent_errors)}])",
+            using_metrics=agent_errors,
+            label="Total Agent Errors",
+            period=period
+        )
         
         agents_widget = cw.GraphWidget(
-            title="Agent Errors",
-            left=[flight_errors, hotel_errors, synthesis_errors, delivery_errors],
+            title="Agent Errors (sum)",
+            left=[total_agent_errors],
             width=12
         )
         
@@ -77,6 +83,16 @@ class ObservabilityStack(Stack):
             label="DLQ Depth"
         )
         
+        # Any message in the DLQ means a request was dropped after retries
+        cw.Alarm(self, "BrokerDLQNotEmpty",
+            alarm_name="travel-agent-broker-dlq-not-empty",
+            metric=dlq_visible,
+            threshold=1,
+            evaluation_periods=1,
+            comparison_operator=cw.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+            treat_missing_data=cw.TreatMissingData.NOT_BREACHING
+        )
+        
         dlq_widget = cw.GraphWidget(
             title="Dead Letter Queue Depth",
             left=[dlq_visible],
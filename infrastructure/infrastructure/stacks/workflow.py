@@ -14,6 +14,7 @@ from aws_cdk import (
     aws_events_targets as targets,
 )
 from constructs import Construct
+from infrastructure._assets import ASSET_EXCLUDES
 import os
 
 class WorkflowStack(Stack):
@@ -21,10 +22,13 @@ class WorkflowStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, bus: events.EventBus, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # Single asset for every Lambda in this stack (one fingerprint, one upload)
+        lambda_code = lambda_.Code.from_asset("lambda", exclude=ASSET_EXCLUDES)
+
         # === 1. DynamoDB Request Log Table ===
+        # Name is generated by CloudFormation; Lambdas get it via REQUEST_TABLE_NAME
         self.request_table = dynamodb.Table(
             self, "TravelRequestLog",
-            table_name="travel-agent-request-log",
             partition_key=dynamodb.Attribute(
                 name="requestId",
                 type=dynamodb.AttributeType.STRING
@@ -38,7 +42,7 @@ class WorkflowStack(Stack):
         self.dlq = sqs.Queue(
             self, "BrokerDLQ",
             queue_name="travel-agent-broker-dlq",
-            retention_period=Duration.days(14)
+            retention_period=Duration.days(7)
         )
 
         # === 3. Broker Lambda ===
@@ -53,26 +57,35 @@ class WorkflowStack(Stack):
             iam.ManagedPolicy.from_aws_managed_policy_name("AWSXrayWriteOnlyAccess")
         )
         self.request_table.grant_read_write_data(broker_role)
-        broker_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=["bedrock:InvokeModel"],
-                resources=[
-                    "arn:aws:bedrock:*::foundation-model/anthropic.claude-3-haiku-20240307-v1:0",
-                    "arn:aws:bedrock:*:*:inference-profile/us.anthropic.claude-3-haiku-20240307-v1:0",
-                ],
-            )
+
+        # Shared by Broker and Synthesis (Synthesis streams its response). Foundation-model
+        # ARNs stay region-wildcarded because the us. inference profile routes across US regions.
+        self.bedrock_policy = iam.ManagedPolicy(
+            self, "InvokeClaudeHaiku",
+            statements=[
+                iam.PolicyStatement(
+                    actions=["bedrock:InvokeModel", "bedrock:InvokeModelWithResponseStream"],
+                    resources=[
+                        "arn:aws:bedrock:*::foundation-model/anthropic.claude-3-haiku-20240307-v1:0",
+                        f"arn:aws:bedrock:*:{self.account}:inference-profile/us.anthropic.claude-3-haiku-20240307-v1:0",
+                    ],
+                )
+            ],
         )
+        broker_role.add_managed_policy(self.bedrock_policy)
 
         self.broker_lambda = lambda_.Function(
             self, "BrokerLambda",
             function_name="travel-agent-broker",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,
             handler="broker.handler.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
+            code=lambda_code,
             timeout=Duration.seconds(60),
             memory_size=256,
             role=broker_role,
             tracing=lambda_.Tracing.ACTIVE,
+            snap_start=lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS,
             environment={
                 "REQUEST_TABLE_NAME": self.request_table.table_name,
                 "POWERTOOLS_SERVICE_NAME": "travel-broker",
@@ -80,6 +93,13 @@ class WorkflowStack(Stack):
             },
         )
         
+        # SnapStart only applies to published versions, so callers go through an alias
+        broker_alias = lambda_.Alias(
+            self, "BrokerLambdaLive",
+            alias_name="live",
+            version=self.broker_lambda.current_version,
+        )
+
         # === 3b. EventBridge Rule (Moved from Ingress) ===
         # Matches source="com.travel.system", detail-type="TravelRequestSubmitted"
         # Targets Broker Lambda
@@ -94,109 +114,82 @@ class WorkflowStack(Stack):
 
         self.rule.add_target(
             targets.LambdaFunction(
-                self.broker_lambda,
+                broker_alias,
                 dead_letter_queue=self.dlq,
-                retry_attempts=2 
+                retry_attempts=2,
+                # Give up after 5 minutes instead of the 24h default so failures reach the DLQ fast
+                max_event_age=Duration.minutes(5)
             )
         )
 
-        # === 4. Define Agent Lambdas (Stubs) ===
-        
-        # Flight Agent
-        self.flight_lambda = lambda_.Function(
-            self, "FlightAgent",
-            function_name="travel-agent-flight",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.flight.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(30),
-            memory_size=128,
-            environment={
-                "AMADEUS_CLIENT_ID": os.environ.get("AMADEUS_CLIENT_ID", ""),
-                "AMADEUS_CLIENT_SECRET": os.environ.get("AMADEUS_CLIENT_SECRET", ""),
-            }
-        )
+        # === 4. Define Agent Lambdas ===
 
-        # Hotel Agent
-        self.hotel_lambda = lambda_.Function(
-            self, "HotelAgent",
-            function_name="travel-agent-hotel",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.hotel.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(30),
-            memory_size=128,
-            environment={
-                "GOOGLE_PLACES_API_KEY": os.environ.get("GOOGLE_PLACES_API_KEY", ""),
-            }
+        # The HTTP search agents only need to write logs, so they share one role
+        agent_role = iam.Role(
+            self, "AgentLambdaRole",
+            assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
         )
-
-        # Weather Agent
-        self.weather_lambda = lambda_.Function(
-            self, "WeatherAgent",
-            function_name="travel-agent-weather",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.weather.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(30),
-            memory_size=128,
-            environment={
-                "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", ""),
-            }
+        agent_role.add_managed_policy(
+            iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole")
         )
 
-        # Events Agent
-        self.events_lambda = lambda_.Function(
-            self, "EventsAgent",
-            function_name="travel-agent-events",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.events.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(30),
-            memory_size=128,
-            environment={
+        # (construct id, function name, handler, timeout s, memory MB, environment, role)
+        # role=None gives the function its own role for the grants below
+        agent_specs = [
+            ("FlightAgent", "travel-agent-flight", "agents.flight.lambda_handler", 30, 128, {
+                "AMADEUS_CLIENT_ID": os.environ.get("AMADEUS_CLIENT_ID", ""),
+                "AMADEUS_CLIENT_SECRET": os.environ.get("AMADEUS_CLIENT_SECRET", ""),
+            }, agent_role),
+            # Runs the hotel, weather and events agents concurrently in one function
+            ("ResearchAgent", "travel-agent-research", "agents.research.lambda_handler", 30, 128, {
                 "GOOGLE_PLACES_API_KEY": os.environ.get("GOOGLE_PLACES_API_KEY", ""),
-            }
-        )
+                "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", ""),
+            }, agent_role),
+            ("SynthesisAgent", "travel-agent-synthesis", "agents.synthesis.lambda_handler", 60, 192, {}, None),
+            ("DeliveryAgent", "travel-agent-delivery", "agents.delivery.lambda_handler", 30, 128, {
+                "REQUEST_TABLE_NAME": self.request_table.table_name,
+                "SENDER_EMAIL": os.environ.get("SENDER_EMAIL", ""),
+            }, None),
+            ("ErrorHandlerAgent", "travel-agent-error-handler", "agents.error_handler.lambda_handler", 10, 128, {
+                "REQUEST_TABLE_NAME": self.request_table.table_name,
+            }, None),
+        ]
 
-        # Synthesis Agent
-        self.synthesis_lambda = lambda_.Function(
-            self, "SynthesisAgent",
-            function_name="travel-agent-synthesis",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.synthesis.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(60),
-            memory_size=256, 
-        )
-        
-        # Grant Bedrock access to Synthesis
-        self.synthesis_lambda.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=["bedrock:InvokeModel"],
-                resources=[
-                    "arn:aws:bedrock:*::foundation-model/anthropic.claude-3-haiku-20240307-v1:0",
-                    "arn:aws:bedrock:*:*:inference-profile/us.anthropic.claude-3-haiku-20240307-v1:0",
-                ],
+        self.agents = {}
+        self.agent_aliases = {}
+        for agent_id, function_name, handler, timeout, memory, environment, role in agent_specs:
+            function = lambda_.Function(
+                self, agent_id,
+                function_name=function_name,
+                runtime=lambda_.Runtime.PYTHON_3_12,
+                architecture=lambda_.Architecture.ARM_64,
+                handler=handler,
+                code=lambda_code,
+                timeout=Duration.seconds(timeout),
+                memory_size=memory,
+                role=role,
+                environment=environment,
+                snap_start=lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS,
+            )
+            self.agents[agent_id] = function
+            self.agent_aliases[agent_id] = lambda_.Alias(
+                self, f"{agent_id}Live",
+                alias_name="live",
+                version=function.current_version,
             )
-        )
 
-        # Delivery Agent
-        self.delivery_lambda = lambda_.Function(
-            self, "DeliveryAgent",
-            function_name="travel-agent-delivery",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.delivery.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(30),
-            memory_size=128,
-        )
-        
+        self.flight_lambda = self.agents["FlightAgent"]
+        self.research_lambda = self.agents["ResearchAgent"]
+        self.synthesis_lambda = self.agents["SynthesisAgent"]
+        self.delivery_lambda = self.agents["DeliveryAgent"]
+        self.error_handler_lambda = self.agents["ErrorHandlerAgent"]
+
+        # Grant Bedrock access to Synthesis
+        self.synthesis_lambda.role.add_managed_policy(self.bedrock_policy)
+
         # Grant Delivery access to Table
         self.request_table.grant_read_write_data(self.delivery_lambda)
-        self.delivery_lambda.add_environment("REQUEST_TABLE_NAME", self.request_table.table_name)
-        self.delivery_lambda.add_environment("SENDER_EMAIL", os.environ.get("SENDER_EMAIL", ""))
-        
+
         # Grant SES SendEmail
         self.delivery_lambda.add_to_role_policy(
             iam.PolicyStatement(
@@ -204,89 +197,69 @@ class WorkflowStack(Stack):
                 resources=["*"], # In production, restrict to specific identity ARN
             )
         )
-        
-        # Error Handler Agent
-        self.error_handler_lambda = lambda_.Function(
-            self, "ErrorHandlerAgent",
-            function_name="travel-agent-error-handler",
-            runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="agents.error_handler.lambda_handler",
-            code=lambda_.Code.from_asset("lambda"),
-            timeout=Duration.seconds(10),
-            memory_size=128,
-        )
-        
+
         # Grant Error Handler access to Table
         self.request_table.grant_read_write_data(self.error_handler_lambda)
-        self.error_handler_lambda.add_environment("REQUEST_TABLE_NAME", self.request_table.table_name)
 
         # === 5. Define Step Functions Tasks ===
+        # result_selector keeps only the fields synthesis/delivery read, so state stays small
         
-        # Flight Task
+        # Flight Task (second parallel branch, output lands in parallel_results[1])
         flight_task = tasks.LambdaInvoke(
             self, "FlightSearch",
-            lambda_function=self.flight_lambda,
+            lambda_function=self.agent_aliases["FlightAgent"],
             payload_response_only=True,
-            result_path="$.flight_output",
         )
 
-        # Hotel Task
-        hotel_task = tasks.LambdaInvoke(
-            self, "HotelSearch",
-            lambda_function=self.hotel_lambda,
-            payload_response_only=True,
-        )
-
-        # Weather Task
-        weather_task = tasks.LambdaInvoke(
-            self, "WeatherSearch",
-            lambda_function=self.weather_lambda,
-            payload_response_only=True,
-        )
-
-        # Events Task
-        events_task = tasks.LambdaInvoke(
-            self, "EventsSearch",
-            lambda_function=self.events_lambda,
+        # Research Task (Hotel, Weather, Events in one invocation)
+        research_task = tasks.LambdaInvoke(
+            self, "ResearchSearch",
+            lambda_function=self.agent_aliases["ResearchAgent"],
             payload_response_only=True,
+            result_selector={
+                "hotels": {"location.$": "$.hotels.location", "hotels.$": "$.hotels.hotels"},
+                "weather": {"summary.$": "$.weather.summary"},
+                "events": {"events.$": "$.events.events"},
+            },
         )
         
         # Synthesis Task
         synthesis_task = tasks.LambdaInvoke(
             self, "SynthesizeResults",
-            lambda_function=self.synthesis_lambda,
+            lambda_function=self.agent_aliases["SynthesisAgent"],
             payload_response_only=True,
+            # Delivery only needs the narrative, so drop the research data from state here
+            result_selector={"narrative.$": "$.narrative", "requestId.$": "$.requestId"},
         )
 
         # Delivery Task
         delivery_task = tasks.LambdaInvoke(
             self, "DeliverEmail",
-            lambda_function=self.delivery_lambda,
+            lambda_function=self.agent_aliases["DeliveryAgent"],
             payload_response_only=True,
         )
         
         # Error Handler Task
         error_handler_task = tasks.LambdaInvoke(
             self, "HandleError",
-            lambda_function=self.error_handler_lambda,
+            lambda_function=self.agent_aliases["ErrorHandlerAgent"],
         )
         
         # === 6. Define Workflow Structure ===
         
-        # Parallel State (Hotel, Weather, Events)
+        # Parallel State (Research, Flight)
+        # None of the searches depend on each other, so flight no longer runs serially first
         parallel = sfn.Parallel(
             self, "ParallelUpdates",
             result_path="$.parallel_results"
         )
-        parallel.branch(hotel_task)
-        parallel.branch(weather_task)
-        parallel.branch(events_task)
+        parallel.branch(research_task)
+        parallel.branch(flight_task)
         
         # Success Chain
-        definition = flight_task.next(parallel).next(synthesis_task).next(delivery_task)
+        definition = parallel.next(synthesis_task).next(delivery_task)
         
         # Add Catch
-        flight_task.add_catch(error_handler_task, errors=["States.ALL"], result_path="$.error")
         parallel.add_catch(error_handler_task, errors=["States.ALL"], result_path="$.error")
         synthesis_task.add_catch(error_handler_task, errors=["States.ALL"], result_path="$.error")
         delivery_task.add_catch(error_handler_task, errors=["States.ALL"], result_path="$.error")
@@ -303,11 +276,14 @@ class WorkflowStack(Stack):
             state_machine_name="travel-agent-workflow",
             definition=definition,
             timeout=Duration.minutes(5),
-            tracing_enabled=True,
+            # Broker keeps ACTIVE tracing for the entry point; per-state traces and
+            # full execution-data logs cost more than they help at Express volumes
+            tracing_enabled=False,
             state_machine_type=sfn.StateMachineType.EXPRESS,
             logs=sfn.LogOptions(
                 destination=log_group,
-                level=sfn.LogLevel.ALL
+                level=sfn.LogLevel.ERROR,
+                include_execution_data=False
             )
         )
         
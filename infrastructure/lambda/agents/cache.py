@@ -0,0 +1,35 @@
+
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after `ttl` seconds.
+
+    Lives at module scope in an agent so it survives across warm invocations.
+    """
+
+    def __init__(self, ttl, max_size=128):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
@@ -2,14 +2,28 @@
 import os
 import boto3
 import json
-from datetime import datetime
+import logging
+from datetime import datetime, timezone
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
-dynamodb = boto3.resource("dynamodb")
+# Setup Logger
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+# Low-level client: the update has a fixed shape, so values are typed by hand.
+# Keepalive holds the connection open between warm invocations.
+dynamodb = boto3.client(
+    "dynamodb",
+    config=Config(tcp_keepalive=True, retries={"mode": "adaptive", "max_attempts": 3})
+)
 ses = boto3.client("ses")
 TABLE_NAME = os.environ.get("REQUEST_TABLE_NAME")
 SENDER_EMAIL = os.environ.get("SENDER_EMAIL", "source@example.com") # User needs to verify this
 
+UPDATE_EXPRESSION = "SET #s = :status, delivery_timestamp = :ts, narrative = :narrative"
+EXPRESSION_NAMES = {"#s": "status"}
+
 def format_email_body(narrative, flight_data, hotel_data, weather_data):
     # Simple HTML conversion
     html = f"""
@@ -38,7 +52,7 @@ def format_email_body(narrative, flight_data, hotel_data, weather_data):
     return html
 
 def lambda_handler(event, context):
-    print("Delivery Agent: Preparing email...")
+    logger.info("Delivery Agent: Preparing email...")
     
     request_id = event.get("requestId")
     narrative = event.get("narrative", "No narrative generated.")
@@ -52,24 +66,22 @@ def lambda_handler(event, context):
     # 1. Update DynamoDB first (Reliability)
     if request_id and TABLE_NAME:
         try:
-            table = dynamodb.Table(TABLE_NAME)
-            update_expr = "SET #s = :status, delivery_timestamp = :ts, narrative = :narrative"
             expr_values = {
-                ":status": "COMPLETED", # "DELIVERED" logic
-                ":ts": datetime.now().isoformat(),
-                ":narrative": narrative
+                ":status": {"S": "COMPLETED"}, # "DELIVERED" logic
+                ":ts": {"S": datetime.now(timezone.utc).isoformat()},
+                ":narrative": {"S": narrative}
             }
-            expr_names = {"#s": "status"}
 
-            table.update_item(
-                Key={"requestId": request_id},
-                UpdateExpression=update_expr,
-                ExpressionAttributeNames=expr_names,
+            dynamodb.update_item(
+                TableName=TABLE_NAME,
+                Key={"requestId": {"S": request_id}},
+                UpdateExpression=UPDATE_EXPRESSION,
+                ExpressionAttributeNames=EXPRESSION_NAMES,
                 ExpressionAttributeValues=expr_values
             )
-            print(f"Updated DynamoDB for {request_id}")
+            logger.info(f"Updated DynamoDB for {request_id}")
         except Exception as e:
-            print(f"Error updating DynamoDB: {e}")
+            logger.error(f"Error updating DynamoDB: {e}")
             status = "DB_UPDATE_FAILED"
 
     # 2. Send Email via SES
@@ -91,13 +103,13 @@ def lambda_handler(event, context):
                     'Body': {'Html': {'Data': body_html}}
                 }
             )
-            print(f"Email sent to {recipient}")
+            logger.info(f"Email sent to {recipient}")
         except ClientError as e:
-            print(f"SES Error: {e}")
+            logger.error(f"SES Error: {e}")
             status = "EMAIL_FAILED_SES_ERROR" # But workflow succeeded
             # Don't fail the Step Function just because email failed (soft fail)
     else:
-        print("Skipping SES: SENDER_EMAIL not configured.")
+        logger.info("Skipping SES: SENDER_EMAIL not configured.")
         status = "EMAIL_SKIPPED"
 
     return {
@@ -1,7 +1,8 @@
 import os
 import boto3
 
-dynamodb = boto3.resource("dynamodb")
+# Low-level client: the update has a fixed shape, so values are typed by hand
+dynamodb = boto3.client("dynamodb")
 TABLE_NAME = os.environ.get("REQUEST_TABLE_NAME")
 
 def lambda_handler(event, context):
@@ -20,14 +21,14 @@ def lambda_handler(event, context):
     
     if request_id and TABLE_NAME:
         try:
-            table = dynamodb.Table(TABLE_NAME)
-            table.update_item(
-                Key={"requestId": request_id},
+            dynamodb.update_item(
+                TableName=TABLE_NAME,
+                Key={"requestId": {"S": request_id}},
                 UpdateExpression="SET #s = :status, #e = :err",
                 ExpressionAttributeNames={"#s": "status", "#e": "error"},
                 ExpressionAttributeValues={
-                    ":status": "FAILED",
-                    ":err": error_msg[:1000] # Truncate to avoid DynamoDB limits
+                    ":status": {"S": "FAILED"},
+                    ":err": {"S": error_msg[:1000]} # Truncate to avoid DynamoDB limits
                 }
             )
             print(f"Updated DynamoDB status to FAILED for {request_id}")
@@ -1,17 +1,30 @@
 
 import json
 import os
-import urllib.request
-import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.cache import TTLCache
+from agents.http import http
 
 # Environment
 GOOGLE_PLACES_API_KEY = os.environ.get("GOOGLE_PLACES_API_KEY")
 PLACES_API_URL = "https://places.googleapis.com/v1/places:searchText"
 
+# Preference queries are independent, so they run side by side (max 2, see handler)
+executor = ThreadPoolExecutor(max_workers=2)
+
+# Identical queries within 30 min are served from memory
+_cache = TTLCache(ttl=30 * 60)
+
 def search_places(query):
     if not GOOGLE_PLACES_API_KEY:
         return []
     
+    cache_key = query.lower().strip()
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     data = {"textQuery": query, "maxResultCount": 5}
     headers = {
         "Content-Type": "application/json",
@@ -19,12 +32,14 @@ def search_places(query):
         "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.rating,places.userRatingCount,places.websiteUri"
     }
     
-    req = urllib.request.Request(PLACES_API_URL, data=json.dumps(data).encode(), headers=headers)
-    
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read())
-            return result.get("places", [])
+        response = http.request("POST", PLACES_API_URL, body=json.dumps(data), headers=headers)
+        if response.status >= 400:
+            print(f"Places API Error: {response.status} {response.data.decode()}")
+            return []
+        places = json.loads(response.data).get("places", [])
+        _cache.set(cache_key, places)
+        return places
     except Exception as e:
         print(f"Error searching places: {e}")
         return []
@@ -43,10 +58,10 @@ def lambda_handler(event, context):
     
     all_places = []
     
-    # Simple Loop for each preference
-    for pref in activity_prefs[:2]: # Limit to top 2 preferences to avoid timeout/quota
-        query = f"{pref} in {destination}"
-        places = search_places(query)
+    prefs = activity_prefs[:2] # Limit to top 2 preferences to avoid timeout/quota
+    results = executor.map(lambda pref: search_places(f"{pref} in {destination}"), prefs)
+    
+    for pref, places in zip(prefs, results):
         for p in places:
             all_places.append({
                 "activity": pref,
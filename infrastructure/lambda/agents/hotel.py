@@ -1,17 +1,26 @@
 
 import json
 import os
-import urllib.request
-import urllib.parse
+
+from agents.cache import TTLCache
+from agents.http import http
 
 # Environment
 GOOGLE_PLACES_API_KEY = os.environ.get("GOOGLE_PLACES_API_KEY")
 PLACES_API_URL = "https://places.googleapis.com/v1/places:searchText"
 
+# Identical destinations within 30 min are served from memory
+_cache = TTLCache(ttl=30 * 60)
+
 def search_hotels(destination, budget_level=None):
     if not GOOGLE_PLACES_API_KEY:
         return []
         
+    cache_key = destination.lower().strip()
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+        
     query = f"hotels in {destination}"
     # Basic logic: just search. Budget filtering strictly by API is hard without price range
     # mapped to priceLevel. We'll filter post-search if possible or just return general results.
@@ -29,12 +38,14 @@ def search_hotels(destination, budget_level=None):
         "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.priceLevel,places.rating,places.userRatingCount,places.websiteUri"
     }
     
-    req = urllib.request.Request(PLACES_API_URL, data=json.dumps(data).encode(), headers=headers)
-    
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read())
-            return result.get("places", [])
+        response = http.request("POST", PLACES_API_URL, body=json.dumps(data), headers=headers)
+        if response.status >= 400:
+            print(f"Places API Error: {response.status} {response.data.decode()}")
+            return []
+        places = json.loads(response.data).get("places", [])
+        _cache.set(cache_key, places)
+        return places
     except Exception as e:
         print(f"Error searching hotels: {e}")
         return []
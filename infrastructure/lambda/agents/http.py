@@ -0,0 +1,11 @@
+import urllib3
+
+# One pool per process, shared by every agent module loaded into it (the research
+# Lambda imports hotel, weather and events together). Connections are reused across
+# warm invocations, so there is no new TLS handshake per call.
+http = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=10,
+    timeout=urllib3.Timeout(connect=3, read=10),
+    retries=urllib3.Retry(total=2, backoff_factor=0.2),
+)
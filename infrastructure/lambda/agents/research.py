@@ -0,0 +1,22 @@
+
+from concurrent.futures import ThreadPoolExecutor
+
+from agents import hotel, weather, events
+
+# One worker per destination search; reused across warm invocations
+executor = ThreadPoolExecutor(max_workers=3)
+
+def lambda_handler(event, context):
+    print("Research Agent: Hotel, Weather and Events searches...")
+    
+    # All three are independent HTTP lookups, so run them side by side
+    hotel_future = executor.submit(hotel.lambda_handler, event, context)
+    weather_future = executor.submit(weather.lambda_handler, event, context)
+    events_future = executor.submit(events.lambda_handler, event, context)
+    
+    # .result() re-raises agent errors so the workflow Catch still fires
+    return {
+        "hotels": hotel_future.result(),
+        "weather": weather_future.result(),
+        "events": events_future.result()
+    }
@@ -7,6 +7,7 @@ from botocore.config import Config
 config = Config(read_timeout=15, connect_timeout=5, retries={"max_attempts": 2})
 bedrock = boto3.client("bedrock-runtime", config=config)
 MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+INFERENCE_CONFIG = {"maxTokens": 2000, "temperature": 0.7}
 
 def parse_event_data(event):
     """Safely extracts all necessary data from the step function input."""
@@ -14,18 +15,18 @@ def parse_event_data(event):
     request_id = event.get("requestId")
     user_intent = event.get("extracted", {})
 
-    # 2. Flight Data
-    # Flight output is usually merged into the event at root or under flight_output
-    flight_data = event.get("flight_output", {})
-
-    # 3. Parallel Branch Data (Hotel, Weather, Events)
+    # 2. Parallel Branch Data (Research, Flight)
     # Step Functions Parallel state output is a list in order of branches
     parallel_results = event.get("parallel_results", [])
     
     # Safely unpack with defaults if list is short/empty
-    hotel_data = parallel_results[0] if len(parallel_results) > 0 else {}
-    weather_data = parallel_results[1] if len(parallel_results) > 1 else {}
-    events_data = parallel_results[2] if len(parallel_results) > 2 else {}
+    research_data = parallel_results[0] if len(parallel_results) > 0 else {}
+    flight_data = parallel_results[1] if len(parallel_results) > 1 else {}
+
+    # 3. Research Data (Hotel, Weather, Events)
+    hotel_data = research_data.get("hotels", {})
+    weather_data = research_data.get("weather", {})
+    events_data = research_data.get("events", {})
 
     return {
         "request_id": request_id,
@@ -36,30 +37,8 @@ def parse_event_data(event):
         "events": events_data
     }
 
-def construct_prompt(data):
-    """Builds the prompt for the LLM."""
-    return f"""
-You are an expert travel agent. Your goal is to write a personalized, cohesive travel recommendation email.
-
-User Request: {json.dumps(data['intent'], indent=2)}
-
-RESEARCH DATA:
-
-1. FLIGHT OPTIONS:
-Source: {data['flights'].get('source', 'Unknown')}
-{json.dumps(data['flights'].get('offers', []), indent=2)}
-
-2. HOTELS:
-Location: {data['hotels'].get('location', 'Unknown')}
-{json.dumps(data['hotels'].get('hotels', []), indent=2)}
-
-3. WEATHER FORECAST:
-{data['weather'].get('summary', 'No weather data available.')}
-
-4. LOCAL ACTIVITIES:
-{json.dumps(data['events'].get('events', []), indent=2)}
-
-INSTRUCTIONS:
+# Static part of the prompt, built once per container
+PROMPT_INSTRUCTIONS = """INSTRUCTIONS:
 Write a travel recommendation email structured as follows:
 
 1. **Introduction**: Friendly opening acknowledging their specific request.
@@ -72,10 +51,41 @@ Write a travel recommendation email structured as follows:
 Tone: Professional, enthusiastic, and personalized. 
 """
 
+def compact_json(value):
+    """Compact JSON for the prompt - indentation only costs input tokens."""
+    return json.dumps(value, separators=(",", ":"))
+
+def construct_prompt(data):
+    """Builds the prompt for the LLM."""
+    return "\n".join([
+        "",
+        "You are an expert travel agent. Your goal is to write a personalized, cohesive travel recommendation email.",
+        "",
+        f"User Request: {compact_json(data['intent'])}",
+        "",
+        "RESEARCH DATA:",
+        "",
+        "1. FLIGHT OPTIONS:",
+        f"Source: {data['flights'].get('source', 'Unknown')}",
+        compact_json(data['flights'].get('offers', [])),
+        "",
+        "2. HOTELS:",
+        f"Location: {data['hotels'].get('location', 'Unknown')}",
+        compact_json(data['hotels'].get('hotels', [])),
+        "",
+        "3. WEATHER FORECAST:",
+        data['weather'].get('summary', 'No weather data available.'),
+        "",
+        "4. LOCAL ACTIVITIES:",
+        compact_json(data['events'].get('events', [])),
+        "",
+        PROMPT_INSTRUCTIONS,
+    ])
+
 def call_bedrock_converse(prompt):
-    """Calls Bedrock Converse API."""
+    """Calls Bedrock ConverseStream and collects the text deltas."""
     try:
-        response = bedrock.converse(
+        response = bedrock.converse_stream(
             modelId=MODEL_ID,
             messages=[
                 {
@@ -83,12 +93,14 @@ def call_bedrock_converse(prompt):
                     "content": [{"text": prompt}]
                 }
             ],
-            inferenceConfig={
-                "maxTokens": 2000,
-                "temperature": 0.7
-            }
+            inferenceConfig=INFERENCE_CONFIG
         )
-        return response["output"]["message"]["content"][0]["text"]
+        # Streaming keeps read_timeout per chunk instead of over the whole 2000-token generation
+        chunks = []
+        for event in response["stream"]:
+            if "contentBlockDelta" in event:
+                chunks.append(event["contentBlockDelta"]["delta"].get("text", ""))
+        return "".join(chunks)
         
     except Exception as e:
         print(f"Error calling Bedrock: {e}")
@@ -1,18 +1,28 @@
 
 import json
 import os
-import urllib.request
-import urllib.parse
+from collections import Counter
 from datetime import datetime
 
+from agents.cache import TTLCache
+from agents.http import http
+
 # Environment
 OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
 OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5/forecast"
 
+# Forecasts change slowly; reuse one for 15 min per city
+_cache = TTLCache(ttl=15 * 60)
+
 def get_forecast(city):
     if not OPENWEATHER_API_KEY:
         return None
         
+    cache_key = city.lower().strip()
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+        
     params = {
         "q": city,
         "appid": OPENWEATHER_API_KEY,
@@ -20,12 +30,14 @@ def get_forecast(city):
         "cnt": 40 # 5 days usually
     }
     
-    query = urllib.parse.urlencode(params)
-    url = f"{OPENWEATHER_BASE_URL}?{query}"
-    
     try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            return json.loads(response.read())
+        response = http.request("GET", OPENWEATHER_BASE_URL, fields=params)
+        if response.status >= 400:
+            print(f"OpenWeather API Error: {response.status} {response.data.decode()}")
+            return None
+        forecast = json.loads(response.data)
+        _cache.set(cache_key, forecast)
+        return forecast
     except Exception as e:
         print(f"Error getting weather: {e}")
         return None
@@ -37,13 +49,16 @@ def summarize_forecast(forecast_data):
     city = forecast_data.get("city", {}).get("name", "Destination")
     list_items = forecast_data.get("list", [])
     
-    # Simple summary: Avg temp of first few items
-    temps = [item["main"]["temp"] for item in list_items[:8]] # First 24h roughly
-    avg_temp = sum(temps) / len(temps) if temps else 0
-    
-    conditions = [item["weather"][0]["description"] for item in list_items[:8]]
-    # Most common condition
-    condition = max(set(conditions), key=conditions.count) if conditions else "unknown"
+    # Simple summary: Avg temp and most common condition, in one pass
+    total = 0.0
+    count = 0
+    conditions = Counter()
+    for item in list_items[:8]: # First 24h roughly
+        total += item["main"]["temp"]
+        count += 1
+        conditions[item["weather"][0]["description"]] += 1
+    avg_temp = total / count if count else 0
+    condition = conditions.most_common(1)[0][0] if conditions else "unknown"
     
     return f"Expect around {avg_temp:.1f}°C with {condition} in {city}."
 
@@ -2,12 +2,15 @@
 import json
 import logging
 import os
+import re
+import time
 import uuid
 import boto3
 import hashlib
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.config import Config
 from botocore.exceptions import ClientError
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 # Decimal Encoder
@@ -17,9 +20,16 @@ class DecimalEncoder(json.JSONEncoder):
             return int(obj) if obj % 1 == 0 else float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+def log_line(prefix, **fields):
+    """Appends fields to a pre-serialized JSON object prefix (which lacks its closing brace)."""
+    if not fields:
+        return prefix + "}"
+    return f"{prefix}, {json.dumps(fields)[1:]}"
+
 # Configuration
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 REQUEST_TABLE_NAME = os.environ.get("REQUEST_TABLE_NAME")
+STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
 MODEL_ID = "us.anthropic.claude-3-haiku-20240307-v1:0"
 
 # Setup Logger
@@ -27,14 +37,28 @@ logger = logging.getLogger()
 logger.setLevel(LOG_LEVEL)
 
 # AWS Clients
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(REQUEST_TABLE_NAME)
+# Low-level client: skips the resource layer's per-call model marshalling, and
+# keepalive holds the connection open between warm invocations
+dynamodb_config = Config(
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 3}
+)
+dynamodb = boto3.client("dynamodb", config=dynamodb_config)
+
+# Items are typed with the serializer on write; the deserializer decodes the
+# raw item returned when the idempotency claim fails
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+def _marshal(item):
+    return {key: serializer.serialize(value) for key, value in item.items()}
 
 bedrock_config = Config(
     region_name="us-east-1",
     retries={"mode": "adaptive", "max_attempts": 5}
 )
 bedrock_client = boto3.client("bedrock-runtime", config=bedrock_config)
+sfn = boto3.client("stepfunctions")
 
 # System Prompt (copied from script)
 SYSTEM_PROMPT = """You are a travel request parser. Your job is to extract structured travel preferences from natural language input and return ONLY valid JSON — no prose, no markdown, no explanation.
@@ -98,17 +122,29 @@ Return this exact JSON shape:
   "clarification_needed": "one sentence explaining what is missing, or null if READY_TO_PROCESS"
 }"""
 
-def _strip_markdown_fences(text):
-    text = text.replace("```json", "").replace("```", "")
-    return text.strip()
+# Decodes the first JSON object in the model output, ignoring any fences or prose around it
+_JSON_DECODER = json.JSONDecoder()
+
+def _decode_first_object(text):
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in model output")
+    parsed, _ = _JSON_DECODER.raw_decode(text, start)
+    return parsed
+
+# Canonical order for missing_fields in the response
+MISSING_FIELD_ORDER = (
+    "origin_city", "destination", "travel_dates", "budget_cad",
+    "not_a_travel_request", "parsing_error",
+)
 
 def _enforce_status_rules(result):
     extracted = result.get("extracted", {})
-    missing = list(result.get("missing_fields", []))
+    missing = set(result.get("missing_fields", []))
 
-    if not extracted.get("origin_city"): missing.append("origin_city")
-    if not extracted.get("destination"): missing.append("destination")
-    if not extracted.get("budget_cad") and extracted.get("budget_cad") != 0: missing.append("budget_cad")
+    if not extracted.get("origin_city"): missing.add("origin_city")
+    if not extracted.get("destination"): missing.add("destination")
+    if not extracted.get("budget_cad") and extracted.get("budget_cad") != 0: missing.add("budget_cad")
 
     travel_dates = extracted.get("travel_dates")
     travel_dates_valid = (
@@ -117,9 +153,12 @@ def _enforce_status_rules(result):
         and bool(travel_dates.get("return"))
     )
     if not travel_dates_valid:
-        missing.append("travel_dates")
+        missing.add("travel_dates")
 
-    result["missing_fields"] = list(dict.fromkeys(missing))
+    # Known fields in canonical order; anything unexpected the model reported goes last
+    ordered = [field for field in MISSING_FIELD_ORDER if field in missing]
+    ordered.extend(sorted(missing.difference(MISSING_FIELD_ORDER)))
+    result["missing_fields"] = ordered
 
     if result["missing_fields"]:
         result["status"] = "NEEDS_CLARIFICATION"
@@ -133,22 +172,52 @@ def _enforce_status_rules(result):
 
     return result
 
+# Constant parts of the Converse request, built once per container
+SYSTEM_BLOCK = [{"text": SYSTEM_PROMPT}]
+INFERENCE_CONFIG = {"maxTokens": 1024, "temperature": 0}
+
+# Cheap pre-filter for input that cannot be a travel request, answered without a
+# Bedrock round-trip. Its verdict is stored as the idempotent result, so it only
+# rejects very short text or text with none of: a digit, a currency marker, a
+# capitalised (place-like) word, a route arrow, or a travel word. Everything else
+# goes to the model.
+_MIN_REQUEST_LENGTH = 8
+_REQUEST_SIGNALS = re.compile(
+    r"\d|[$€£¥→]|\b[A-Z][A-Za-z]"
+    r"|(?i:\b(?:cad|usd|eur|fly|flying|flight|flights|trip|travel|travelling|traveling|"
+    r"visit|vacation|holiday|getaway|go|going|to|from|hotel|book|leave|leaving|depart|"
+    r"return|budget)\b)"
+)
+
+def _looks_like_travel_request(user_input):
+    text = user_input.strip()
+    return len(text) >= _MIN_REQUEST_LENGTH and _REQUEST_SIGNALS.search(text) is not None
+
 def extract_travel_intent(user_input):
+    if not _looks_like_travel_request(user_input):
+        result = {
+            "status": "NEEDS_CLARIFICATION",
+            "missing_fields": ["not_a_travel_request"],
+            "extracted": {},
+            "budget_warning": None,
+            "clarification_needed": "This doesn't look like a travel request. Tell us where you're going, from where, when, and your budget.",
+            "_meta": {"input_tokens": 0, "output_tokens": 0, "model": None}
+        }
+        return _enforce_status_rules(result)
+
     response = bedrock_client.converse(
         modelId=MODEL_ID,
-        system=[{"text": SYSTEM_PROMPT}],
+        system=SYSTEM_BLOCK,
         messages=[{"role": "user", "content": [{"text": user_input}]}],
-        inferenceConfig={"maxTokens": 1024, "temperature": 0}
+        inferenceConfig=INFERENCE_CONFIG
     )
     
-    raw_text = response["output"]["message"]["content"][0]["text"].strip()
+    raw_text = response["output"]["message"]["content"][0]["text"]
     token_usage = response.get("usage", {})
     
-    raw_text = _strip_markdown_fences(raw_text)
-    
     try:
-        parsed = json.loads(raw_text)
-    except json.JSONDecodeError:
+        parsed = _decode_first_object(raw_text)
+    except ValueError:
         # Fallback error if JSON fails
         parsed = {
              "status": "NEEDS_CLARIFICATION",
@@ -202,7 +271,9 @@ def lambda_handler(event, context):
         "phase": "broker_lambda",
         "requestId": context.aws_request_id
     }
-    logger.info(json.dumps({**log_context, "status": "start", "input_length": len(user_input)}))
+    # Static fields are serialized once; each line only encodes its own fields
+    log_prefix = json.dumps(log_context)[:-1]
+    logger.info(log_line(log_prefix, status="start", input_length=len(user_input)))
 
     # Idempotency Check
     # Use request_id from intake if available, otherwise hash input
@@ -211,53 +282,72 @@ def lambda_handler(event, context):
     else:
         request_hash = hashlib.sha256(user_input.encode("utf-8")).hexdigest()
     
+    # One wall-clock read per request, shared by the execution name, ttl and timestamp
+    now = datetime.now(timezone.utc)
+    ttl = int((now + timedelta(days=30)).timestamp())
+
+    # Claim the request with a conditional write instead of read-then-write.
+    # On a duplicate the failed write hands back the existing item in the same round-trip.
     try:
-        existing_item = table.get_item(Key={"requestId": request_hash})
-        if "Item" in existing_item:
-            logger.info(json.dumps({**log_context, "status": "cache_hit", "request_hash": request_hash}))
+        dynamodb.put_item(
+            TableName=REQUEST_TABLE_NAME,
+            Item=_marshal({
+                "requestId": request_hash,
+                "ttl": ttl,
+                "correlationId": correlation_id,
+                "timestamp": now.isoformat(),
+                "status": "PROCESSING"
+            }),
+            ConditionExpression="attribute_not_exists(requestId)",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+    except ClientError as e:
+        existing_item = e.response.get("Item", {})
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            # If DynamoDB fails (e.g. bad table name), we log it but PROCEED to Bedrock
+            # We do not want a cache failure to kill the service
+            logger.error(log_line(log_prefix, status="dynamodb_claim_error", error=str(e)))
+        elif "result" in existing_item:
+            logger.info(log_line(log_prefix, status="cache_hit", request_hash=request_hash))
             return {
                 "statusCode": 200,
                 "headers": {"Content-Type": "application/json"},
-                "body": json.dumps(existing_item["Item"]["result"], cls=DecimalEncoder)
+                "body": json.dumps(deserializer.deserialize(existing_item["result"]), cls=DecimalEncoder)
             }
-    except ClientError as e:
-        # If DynamoDB fails (e.g. bad table name), we log it but PROCEED to Bedrock
-        # We do not want a cache failure to kill the service
-        logger.error(json.dumps({**log_context, "status": "dynamodb_read_error", "error": str(e)}))
+        else:
+            # Earlier attempt never stored a result (e.g. Bedrock failed), so process it again
+            logger.info(log_line(log_prefix, status="claim_without_result", request_hash=request_hash))
 
     # Bedrock Call
-    start_time = datetime.now()
+    start_time = time.monotonic()
     try:
         result = extract_travel_intent(user_input)
-        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-        logger.info(json.dumps({**log_context, "status": "bedrock_success", "duration_ms": duration_ms}))
+        duration_ms = (time.monotonic() - start_time) * 1000
+        logger.info(log_line(log_prefix, status="bedrock_success", duration_ms=duration_ms))
 
 
         # Start Step Functions Execution if ready
         execution_arn = None
         if result.get("status") == "READY_TO_PROCESS":
-             state_machine_arn = os.environ.get("STATE_MACHINE_ARN")
-             if state_machine_arn:
+             if STATE_MACHINE_ARN:
                  try:
-                     sfn = boto3.client("stepfunctions")
                      sfn_response = sfn.start_execution(
-                         stateMachineArn=state_machine_arn,
-                         name=f"exec-{request_hash}-{int(datetime.now().timestamp())}", 
+                         stateMachineArn=STATE_MACHINE_ARN,
+                         name=f"exec-{request_hash}-{int(now.timestamp())}", 
                          input=json.dumps({
                              "requestId": request_hash,
                              "extracted": result["extracted"]
                          }, cls=DecimalEncoder)
                      )
                      execution_arn = sfn_response["executionArn"]
-                     logger.info(json.dumps({**log_context, "status": "job_started", "execution_arn": execution_arn}))
+                     logger.info(log_line(log_prefix, status="job_started", execution_arn=execution_arn))
                  except Exception as e:
-                     logger.error(json.dumps({**log_context, "status": "sfn_start_error", "error": str(e)}))
+                     logger.error(log_line(log_prefix, status="sfn_start_error", error=str(e)))
              else:
-                 logger.warning(json.dumps({**log_context, "status": "no_state_machine_arn"}))
+                 logger.warning(log_line(log_prefix, status="no_state_machine_arn"))
 
         # Write to DynamoDB (Best Effort)
         try:
-            ttl = int((datetime.now() + timedelta(days=30)).timestamp())
             # Set DynamoDB status based on whether workflow was actually started
             if execution_arn:
                 db_status = "STARTED"
@@ -271,16 +361,16 @@ def lambda_handler(event, context):
                 "result": result,
                 "ttl": ttl,
                 "correlationId": correlation_id,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "status": db_status
             }
             if execution_arn:
                 item["executionArn"] = execution_arn
                 
-            table.put_item(Item=item)
+            dynamodb.put_item(TableName=REQUEST_TABLE_NAME, Item=_marshal(item))
 
         except ClientError as e:
-             logger.error(json.dumps({**log_context, "status": "dynamodb_write_error", "error": str(e)}))
+             logger.error(log_line(log_prefix, status="dynamodb_write_error", error=str(e)))
         
         response_body = {"result": result, "executionArn": execution_arn, "correlationId": correlation_id}
         
@@ -291,7 +381,7 @@ def lambda_handler(event, context):
         }
 
     except Exception as e:
-        logger.error(json.dumps({**log_context, "status": "error", "error": str(e)}))
+        logger.error(log_line(log_prefix, status="error", error=str(e)))
         return {
             "statusCode": 500,
             "body": json.dumps({"error": "Internal Server Error", "correlationId": correlation_id}, cls=DecimalEncoder)
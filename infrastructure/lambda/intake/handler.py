@@ -1,11 +1,13 @@
 
+import functools
 import json
 import logging
 import os
 import boto3
 import uuid
 import hashlib
-from datetime import datetime
+from botocore.config import Config
+from datetime import datetime, timezone
 
 # Configuration
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
@@ -15,68 +17,94 @@ EVENT_BUS_NAME = os.environ.get("EVENT_BUS_NAME")
 logger = logging.getLogger()
 logger.setLevel(LOG_LEVEL)
 
+# Compact JSON for logs, the event Detail and response bodies
+dumps = functools.partial(json.dumps, separators=(",", ":"))
+
 # AWS Clients
-events_client = boto3.client("events")
+events_client = boto3.client("events", config=Config(tcp_keepalive=True))
+
+# Open the EventBridge connection during init so the first request doesn't pay the
+# TLS handshake. Only inside Lambda, so importing the module locally stays offline.
+if os.environ.get("AWS_LAMBDA_RUNTIME_API") and EVENT_BUS_NAME:
+    try:
+        events_client.describe_event_bus(Name=EVENT_BUS_NAME)
+    except Exception as e:
+        logger.warning(dumps({"status": "warmup_failed", "error": str(e)}))
+
+# Constant part of every published entry; only Detail changes per request
+EVENT_TEMPLATE = {
+    "Source": "com.travel.system",
+    "DetailType": "TravelRequestSubmitted",
+    "EventBusName": EVENT_BUS_NAME
+}
 
 def lambda_handler(event, context):
     try:
-        correlation_id = str(uuid.uuid4())
+        # Lambda already issues a unique per-invocation id, which also ties our records
+        # to the runtime's START/REPORT lines; uuid4 only when run outside Lambda
+        correlation_id = getattr(context, "aws_request_id", None) or str(uuid.uuid4())
         
         # Parse Input
-        if "body" in event:
+        # API Gateway sends the body as a string; direct invokes may pass it already parsed
+        body = event.get("body")
+        if isinstance(body, dict):
+            user_input = body.get("input")
+        elif isinstance(body, (str, bytes)):
             try:
-                body = json.loads(event["body"])
-                user_input = body.get("input")
+                user_input = json.loads(body).get("input")
             except:
-                user_input = event.get("body")
+                user_input = body
         else:
             user_input = event.get("input")
             
         if not user_input:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "No input provided", "correlationId": correlation_id})
+                "body": dumps({"error": "No input provided", "correlationId": correlation_id})
             }
             
         # Generate Request ID (Hash)
         request_id = hashlib.sha256(user_input.encode("utf-8")).hexdigest()
         
-        # Log Structured Event
+        # Structured log context, shared by the success and failure records
         log_context = {
             "correlationId": correlation_id,
             "requestId": request_id, 
             "phase": "intake_lambda"
         }
-        logger.info(json.dumps({**log_context, "status": "received", "length": len(user_input)}))
         
         # Publish Event
-        event_entry = {
-            "Source": "com.travel.system",
-            "DetailType": "TravelRequestSubmitted",
-            "Detail": json.dumps({
-                "requestId": request_id,
-                "input": user_input,
-                "correlationId": correlation_id,
-                "timestamp": datetime.now().isoformat()
-            }),
-            "EventBusName": EVENT_BUS_NAME
-        }
+        event_entry = EVENT_TEMPLATE.copy()
+        event_entry["Detail"] = dumps({
+            "requestId": request_id,
+            "input": user_input,
+            "correlationId": correlation_id,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
         
         response = events_client.put_events(Entries=[event_entry])
         
         if response["FailedEntryCount"] > 0:
-            logger.error(json.dumps({**log_context, "status": "event_bridge_error", "response": response}))
+            logger.error(dumps({**log_context, "status": "event_bridge_error", "response": response}))
             return {
                 "statusCode": 500,
-                "body": json.dumps({"error": "Failed to queue request", "correlationId": correlation_id})
+                "body": dumps({"error": "Failed to queue request", "correlationId": correlation_id})
             }
             
-        logger.info(json.dumps({**log_context, "status": "published", "event_id": response["Entries"][0]["EventId"]}))
+        # One record per accepted request (received + published); failures log on their own path.
+        # Skip building the JSON entirely when LOG_LEVEL filters INFO out.
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(dumps({
+                **log_context,
+                "status": "published",
+                "length": len(user_input),
+                "event_id": response["Entries"][0]["EventId"]
+            }))
         
         return {
             "statusCode": 202,
             "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            "body": dumps({
                 "message": "Request accepted",
                 "requestId": request_id,
                 "correlationId": correlation_id
@@ -84,8 +112,8 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        logger.error(json.dumps({"status": "error", "error": str(e), "context": context.aws_request_id}))
+        logger.error(dumps({"status": "error", "error": str(e), "context": context.aws_request_id}))
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "Internal Server Error"})
+            "body": dumps({"error": "Internal Server Error"})
         }
@@ -1,5 +1,6 @@
 
 import boto3
+import functools
 import json
 import time
 import requests
@@ -12,9 +13,17 @@ WORKFLOW_STACK_NAME = "TravelAgentWorkflowStack" # Needed for table lookup? Mayb
 REGION = "us-east-1"
 
 # Clients
+# One session for every POST so the API Gateway connection is reused
+http = requests.Session()
 cf = boto3.client("cloudformation", region_name=REGION)
 dynamodb = boto3.resource("dynamodb", region_name=REGION)
 
+@functools.lru_cache(maxsize=None)
+def stack_resources(stack_name):
+    """All resource summaries for a stack, fetched once (all pages) and shared by the lookups below."""
+    paginator = cf.get_paginator("list_stack_resources")
+    return [r for page in paginator.paginate(StackName=stack_name) for r in page["StackResourceSummaries"]]
+
 def get_stack_outputs():
     """Retrieve API URL."""
     print(f"🔍 Fetching stack outputs for '{STACK_NAME}'...")
@@ -28,8 +37,7 @@ def get_stack_outputs():
                 break
         if not api_url:
             # Fallback
-            resources = cf.list_stack_resources(StackName=STACK_NAME)
-            for r in resources["StackResourceSummaries"]:
+            for r in stack_resources(STACK_NAME):
                 if r["ResourceType"] == "AWS::ApiGateway::RestApi":
                      api_url = f"https://{r['PhysicalResourceId']}.execute-api.{REGION}.amazonaws.com/prod/"
                      break
@@ -42,14 +50,12 @@ def get_table_name():
     # Table moved to WorkflowStack!
     try:
         # Check WorkflowStack first
-        resources = cf.list_stack_resources(StackName=WORKFLOW_STACK_NAME)
-        for r in resources["StackResourceSummaries"]:
+        for r in stack_resources(WORKFLOW_STACK_NAME):
             if r["LogicalResourceId"].startswith("TravelRequestLog"):
                 return r["PhysicalResourceId"]
                 
         # Fallback to IngressStack (if not moved yet?)
-        resources = cf.list_stack_resources(StackName=STACK_NAME)
-        for r in resources["StackResourceSummaries"]:
+        for r in stack_resources(STACK_NAME):
             if r["LogicalResourceId"].startswith("TravelRequestLog"):
                 return r["PhysicalResourceId"]
                 
@@ -60,11 +66,13 @@ def get_table_name():
 
 API_URL = get_stack_outputs()
 TABLE_NAME = get_table_name()
+TABLE = dynamodb.Table(TABLE_NAME) if TABLE_NAME else None
 
 def check_workflow_completion(request_id):
     print(f"   ⏳ Polling DynamoDB for completion status (max 90s)...")
     start_time = time.time()
-    table = dynamodb.Table(TABLE_NAME)
+    table = TABLE
+    delay = 0.5
     
     while time.time() - start_time < 90:
         try:
@@ -84,7 +92,9 @@ def check_workflow_completion(request_id):
         except Exception as e:
             print(f"Error checking DynamoDB: {e}")
                  
-        time.sleep(5)
+        # Back off from 0.5s up to 5s: quick detection early, fewer reads on long runs
+        time.sleep(delay)
+        delay = min(delay * 2, 5)
     
     print("   ❌ Timeout waiting for completion.")
     return False
@@ -99,7 +109,7 @@ def test_full_workflow():
     # 1. Submit Request
     url = f"{API_URL}travel"
     print(f"   POST {url}")
-    response = requests.post(url, json=payload)
+    response = http.post(url, json=payload, timeout=30)
     
     if response.status_code != 202:
         print(f"   ❌ API Request Failed: {response.status_code}")
@@ -114,17 +124,19 @@ def test_full_workflow():
         print("❌ Table Name not found.")
         return
         
-    table = dynamodb.Table(TABLE_NAME)
+    table = TABLE
     execution_arn = None
     
     start_time = time.time()
+    delay = 0.25
     while time.time() - start_time < 60:
         item = table.get_item(Key={"requestId": request_id}).get("Item")
         if item and "executionArn" in item:
             execution_arn = item["executionArn"]
             print(f"   ✅ Found Execution ARN: {execution_arn}")
             break
-        time.sleep(2)
+        time.sleep(delay)
+        delay = min(delay * 2, 2)
     
     if not execution_arn:
         print("   ❌ Timeout waiting for execution ARN. Workflow did not start?")
@@ -0,0 +1,35 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("REQUEST_TABLE_NAME", "test-requests")
+
+_HANDLER_PATH = Path(__file__).resolve().parents[2] / "lambda" / "broker" / "handler.py"
+_spec = importlib.util.spec_from_file_location("broker_handler", _HANDLER_PATH)
+broker = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(broker)
+
+
+@pytest.mark.parametrize("user_input", [
+    "Edmonton → Paris, March 3-10, $2000",
+    "Edmonton-Paris March 3-10 2000 CAD",
+    "YEG-CDG 2025-03-03 to 2025-03-10",
+    "yeg cdg march 3-10 2000",
+    "I want to go to Paris next month, budget $2000 CAD",
+])
+def test_prefilter_passes_requests_to_model(user_input):
+    assert broker._looks_like_travel_request(user_input)
+
+
+@pytest.mark.parametrize("user_input", [
+    "",
+    "   ",
+    "hi",
+    "asdf",
+    "hello there how are you",
+])
+def test_prefilter_rejects_non_requests(user_input):
+    assert not broker._looks_like_travel_request(user_input)
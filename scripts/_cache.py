@@ -0,0 +1,61 @@
+"""
+On-disk cache of Bedrock extraction responses for repeated script runs.
+
+Opt-in with BEDROCK_CACHE=1. When enabled, a repeat of the exact same (model, system
+prompt, input) skips the Converse call and reuses the parsed model output. It is off by
+default because test_inputs.py exists to exercise the live model.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+CACHE_PATH = os.environ.get("BEDROCK_CACHE_PATH", ".bedrock_cache.sqlite")
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("BEDROCK_CACHE") == "1"
+
+
+def cache_key(model_id: str, system_prompt: str, user_input: str) -> str:
+    """Changing the model or the prompt invalidates every entry."""
+    digest = hashlib.sha256()
+    for part in (model_id, system_prompt, user_input):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key -> JSON store, safe to share between threads."""
+
+    def __init__(self, path: str = CACHE_PATH):
+        self._path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+            conn.commit()
@@ -5,6 +5,7 @@ Parses a natural language travel request and returns structured preferences,
 or flags exactly what information is missing before processing can begin.
 """
 
+import functools
 import json
 import re
 import sys
@@ -12,6 +13,11 @@ import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
+try:
+    from scripts._cache import ResponseCache, cache_enabled, cache_key
+except ImportError:  # run directly as scripts/extract_travel_intent.py
+    from _cache import ResponseCache, cache_enabled, cache_key
+
 MODEL_ID = "us.anthropic.claude-3-haiku-20240307-v1:0"
 
 SYSTEM_PROMPT = """You are a travel request parser. Your job is to extract structured travel preferences from natural language input and return ONLY valid JSON — no prose, no markdown, no explanation.
@@ -34,43 +40,14 @@ OPTIONAL (capture if present, null if absent):
 VALIDATION RULES:
 1. If origin_city is not explicitly stated, set it to null and add "origin_city" to missing_fields.
 2. If destination is vague or non-specific (e.g. "somewhere warm", "a beach", "somewhere cheap"), set it to null and add "destination" to missing_fields.
-3. Travel dates must be specific enough to pass to a flight search API. You must NOT infer specific dates from seasons (e.g. "summer", "winter") or vague timeframes (e.g. "next week", "sometime", "later this year"). If the user says "sometime this summer", "in March" (without days), or "in 2024", this is VAGUE. You MUST set travel_dates to null and add "travel_dates" to missing_fields. Do not guess.
+3. Travel dates must be specific enough to pass to a flight search API. You must NOT infer specific dates from seasons (e.g. "summer", "winter") or vague timeframes (e.g. "next week", "next month", "sometime", "later this year"). If the user says "sometime this summer", "in March" (without days), or "in 2024", this is VAGUE. You MUST set travel_dates to null and add "travel_dates" to missing_fields. Do not guess.
 
 4. If budget_cad is absent from the request entirely, set it to null and add "budget_cad" to missing_fields. NEVER set budget_cad to null if a dollar amount was stated — even if it seems unrealistically low. $200 stated = budget_cad: 200. $50 stated = budget_cad: 50. The number the user says is what gets extracted, always.
 5. If dates are contradictory (e.g. two different stated departure dates, or a departure date that is after the return date), set travel_dates to null, add "travel_dates" to missing_fields, and explain the conflict in the notes field.
 6. If budget appears unrealistically low for the stated trip (e.g. under $500 CAD for international flights), still extract the stated amount into budget_cad but set budget_warning to a brief explanation.
 7. If the input is not a travel request at all, set all fields to null and add "not_a_travel_request" to missing_fields.
 
-STATUS RULE — THIS IS ABSOLUTE:
-- Set status to "READY_TO_PROCESS" if and only if missing_fields is an empty array AND all four required fields (origin_city, destination, travel_dates, budget_cad) are non-null in extracted.
-- Set status to "NEEDS_CLARIFICATION" in every other case — including when a required field is null even if missing_fields was accidentally left empty.
-- A non-null budget_warning does NOT affect status. A warning is informational only.
-
-CRITICAL SELF-CHECK — you must evaluate each condition before writing the JSON:
-
-  CONDITION A: Is origin_city set to a non-null string in your extracted object?
-    → If NO: missing_fields must include "origin_city" AND status must be "NEEDS_CLARIFICATION"
-
-  CONDITION B: Is destination set to a non-null specific searchable city/country?
-    → If NO: missing_fields must include "destination" AND status must be "NEEDS_CLARIFICATION"
-
-  CONDITION C: Are BOTH travel_dates.departure AND travel_dates.return non-null YYYY-MM-DD strings derived from EXPLICIT user input?
-    → If you inferred dates from "summer", "winter", "next month", etc., YOU ARE WRONG. Set travel_dates to null, add "travel_dates" to missing_fields, and set status to "NEEDS_CLARIFICATION".
-    → If NO: missing_fields must include "travel_dates" AND status must be "NEEDS_CLARIFICATION"
-
-  CONDITION D: Is budget_cad set to a non-null number?
-    → If NO: missing_fields must include "budget_cad" AND status must be "NEEDS_CLARIFICATION"
-
-  status = "READY_TO_PROCESS" ONLY when conditions A, B, C, and D are ALL true simultaneously.
-  This check overrides any other reasoning. There are no exceptions.
-
-BUDGET EXTRACTION RULE — READ THIS CAREFULLY:
-  budget_cad must equal the exact number the user stated, regardless of whether you think it is realistic.
-  If the user says "$200" → budget_cad: 200
-  If the user says "$50" → budget_cad: 50
-  If the user says "$1" → budget_cad: 1
-  You are not permitted to set budget_cad to null when a dollar amount was explicitly stated.
-  Use budget_warning to flag an unrealistic amount. Never use null.
+Status and missing_fields are re-checked in code, so focus on extracting each field correctly.
 
 Return this exact JSON shape:
 {
@@ -91,35 +68,90 @@ Return this exact JSON shape:
   "clarification_needed": "one sentence explaining what is missing, or null if READY_TO_PROCESS"
 }"""
 
+# Constant parts of every Converse request, built once
+_SYSTEM_BLOCK = [{"text": SYSTEM_PROMPT}]
+_INFERENCE_CONFIG = {
+    "maxTokens": 512,  # the fixed output schema needs ~150-300 tokens
+    "temperature": 0,  # deterministic — extraction not generation
+}
+
 
+@functools.lru_cache(maxsize=1)
 def build_bedrock_client() -> boto3.client:
+    """Return the shared Bedrock client.
+
+    Built once per process so every caller (including concurrent ones) reuses the same
+    credentials, endpoint resolution and pooled keep-alive connections.
+    """
     config = Config(
         region_name="us-east-1",
         retries={"mode": "adaptive", "max_attempts": 5},
+        tcp_keepalive=True,
     )
     return boto3.client("bedrock-runtime", config=config)
 
 
+# Opening (``` / ~~~ with optional language tag) or closing fence, matched in one pass
+_FENCE_RE = re.compile(r'^(?:```|~~~)[a-z]*\s*\n?|\n?\s*(?:```|~~~)\s*$', re.MULTILINE)
+
+
 def _strip_markdown_fences(text: str) -> str:
     """Remove markdown code fences (``` and ~~~) if the model wraps JSON despite instructions."""
-    text = re.sub(r'^```[a-z]*\s*\n?', '', text, flags=re.MULTILINE)
-    text = re.sub(r'^~~~[a-z]*\s*\n?', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\n?\s*```\s*$', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\n?\s*~~~\s*$', '', text, flags=re.MULTILINE)
-    return text.strip()
+    # Usual case: no fence characters at all, so skip the regex
+    if '`' not in text and '~' not in text:
+        return text.strip()
+    return _FENCE_RE.sub('', text).strip()
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _parse_json_defensively(raw_text: str) -> tuple[dict, str]:
+    """Parse the model's JSON, tolerating stray prose around the object.
+
+    Tries the whole text, then the outermost {...} slice, then the first complete object
+    (which survives trailing text containing braces). Returns the object and which of
+    those worked; re-raises the original error if none did.
+    """
+    try:
+        return json.loads(raw_text), "direct"
+    except json.JSONDecodeError as first_error:
+        start = raw_text.find("{")
+        end = raw_text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                return json.loads(raw_text[start:end + 1]), "slice"
+            except json.JSONDecodeError:
+                pass
+            try:
+                return _JSON_DECODER.raw_decode(raw_text, start)[0], "first_object"
+            except json.JSONDecodeError:
+                pass
+        raise first_error
+
+
+# Required fields that only need a non-empty value; budget and dates have their own checks
+_REQUIRED_TEXT_FIELDS = ("origin_city", "destination")
+
+# Canonical order for missing_fields in the result (same order as the broker Lambda)
+_MISSING_FIELD_ORDER = (
+    "origin_city", "destination", "travel_dates", "budget_cad",
+    "not_a_travel_request", "parsing_error",
+)
 
 
 def _enforce_status_rules(result: dict) -> dict:
     """Enforce status, missing_fields, and budget_warning rules in code rather than trusting model output."""
-    extracted = result.get("extracted", {})
-    missing = list(result.get("missing_fields", []))
+    # The model may send explicit nulls (e.g. "extracted": null for a non-travel request)
+    extracted = result.get("extracted") or {}
+    missing = set(result.get("missing_fields") or [])
+
+    missing.update(field for field in _REQUIRED_TEXT_FIELDS if not extracted.get(field))
 
-    if not extracted.get("origin_city"):
-        missing.append("origin_city")
-    if not extracted.get("destination"):
-        missing.append("destination")
-    if not extracted.get("budget_cad") and extracted.get("budget_cad") != 0:
-        missing.append("budget_cad")
+    # A stated budget of 0 (or 0.0) is still a budget; only absent/empty values are missing
+    budget = extracted.get("budget_cad")
+    if not budget and budget != 0:
+        missing.add("budget_cad")
 
     travel_dates = extracted.get("travel_dates")
     travel_dates_valid = (
@@ -128,9 +160,12 @@ def _enforce_status_rules(result: dict) -> dict:
         and bool(travel_dates.get("return"))
     )
     if not travel_dates_valid:
-        missing.append("travel_dates")
+        missing.add("travel_dates")
 
-    result["missing_fields"] = list(dict.fromkeys(missing))
+    # Known fields in canonical order; anything unexpected the model reported goes last
+    ordered = [field for field in _MISSING_FIELD_ORDER if field in missing]
+    ordered.extend(sorted(missing.difference(_MISSING_FIELD_ORDER)))
+    result["missing_fields"] = ordered
 
     if result["missing_fields"]:
         result["status"] = "NEEDS_CLARIFICATION"
@@ -145,30 +180,68 @@ def _enforce_status_rules(result: dict) -> dict:
     return result
 
 
-def extract_travel_intent(client: boto3.client, user_input: str) -> dict:
-    """Call the Bedrock Converse API and return the parsed extraction result."""
-    response = client.converse(
+_response_cache = ResponseCache()
+
+
+def _collect_stream(response: dict) -> tuple[str, dict]:
+    """Join the text deltas of a ConverseStream response, ticking a progress dot per chunk on stderr."""
+    chunks = []
+    token_usage = {}
+    for event in response["stream"]:
+        if "contentBlockDelta" in event:
+            chunks.append(event["contentBlockDelta"]["delta"].get("text", ""))
+            print(".", end="", file=sys.stderr, flush=True)
+        elif "metadata" in event:
+            token_usage = event["metadata"].get("usage", {})
+    print(file=sys.stderr)
+    return "".join(chunks).strip(), token_usage
+
+
+def extract_travel_intent(client: boto3.client, user_input: str, stream: bool = False) -> dict:
+    """Call the Bedrock Converse API and return the parsed extraction result.
+
+    With stream=True the response is read via ConverseStream so an interactive caller sees
+    progress as tokens arrive; the JSON is still parsed once, after the stream closes.
+    """
+    # Nothing to extract: answer without a Bedrock call
+    if not user_input or not user_input.strip():
+        return _enforce_status_rules({
+            "extracted": {},
+            "missing_fields": [],
+            "budget_warning": None,
+            "clarification_needed": None,
+            "_meta": {"input_tokens": 0, "output_tokens": 0, "model": MODEL_ID},
+        })
+
+    key = cache_key(MODEL_ID, SYSTEM_PROMPT, user_input) if cache_enabled() else None
+    cached = _response_cache.get(key) if key else None
+    if cached is not None:
+        cached["_meta"] = {"input_tokens": 0, "output_tokens": 0, "model": MODEL_ID, "cached": True}
+        return _enforce_status_rules(cached)
+
+    request = dict(
         modelId=MODEL_ID,
-        system=[{"text": SYSTEM_PROMPT}],
+        system=_SYSTEM_BLOCK,
         messages=[
             {
                 "role": "user",
                 "content": [{"text": user_input}],
             }
         ],
-        inferenceConfig={
-            "maxTokens": 1024,
-            "temperature": 0,  # deterministic — extraction not generation
-        },
+        inferenceConfig=_INFERENCE_CONFIG,
     )
 
-    raw_text = response["output"]["message"]["content"][0]["text"].strip()
-    token_usage = response.get("usage", {})
+    if stream:
+        raw_text, token_usage = _collect_stream(client.converse_stream(**request))
+    else:
+        response = client.converse(**request)
+        raw_text = response["output"]["message"]["content"][0]["text"].strip()
+        token_usage = response.get("usage", {})
 
     raw_text = _strip_markdown_fences(raw_text)
 
     try:
-        parsed = json.loads(raw_text)
+        parsed, parse_mode = _parse_json_defensively(raw_text)
     except json.JSONDecodeError as e:
         print(
             json.dumps({"error": "JSONDecodeError", "message": str(e), "raw_response": raw_text}),
@@ -176,10 +249,14 @@ def extract_travel_intent(client: boto3.client, user_input: str) -> dict:
         )
         raise
 
+    if key:
+        _response_cache.set(key, parsed)
+
     parsed["_meta"] = {
         "input_tokens": token_usage.get("inputTokens"),
         "output_tokens": token_usage.get("outputTokens"),
         "model": MODEL_ID,
+        "parse_mode": parse_mode,
     }
 
     return _enforce_status_rules(parsed)
@@ -195,31 +272,37 @@ def print_result(user_input: str, result: dict) -> None:
     meta = result.get("_meta", {})
 
     separator = "─" * 60
-    print(f"\n{separator}")
-    print(f"INPUT:  {user_input}")
-    print(f"STATUS: {status}")
+    lines = [
+        f"\n{separator}",
+        f"INPUT:  {user_input}",
+        f"STATUS: {status}",
+    ]
 
     if status == "READY_TO_PROCESS":
-        print(f"  Origin      : {extracted.get('origin_city')}")
-        print(f"  Destination : {extracted.get('destination')}")
         dates = extracted.get("travel_dates") or {}
-        print(f"  Departure   : {dates.get('departure')}")
-        print(f"  Return      : {dates.get('return')}")
-        print(f"  Budget (CAD): {extracted.get('budget_cad')}")
-        print(f"  Depart time : {extracted.get('departure_time_preference')}")
-        print(f"  Travellers  : {extracted.get('traveller_count')}")
-        print(f"  Activities  : {extracted.get('activity_preferences')}")
+        lines += [
+            f"  Origin      : {extracted.get('origin_city')}",
+            f"  Destination : {extracted.get('destination')}",
+            f"  Departure   : {dates.get('departure')}",
+            f"  Return      : {dates.get('return')}",
+            f"  Budget (CAD): {extracted.get('budget_cad')}",
+            f"  Depart time : {extracted.get('departure_time_preference')}",
+            f"  Travellers  : {extracted.get('traveller_count')}",
+            f"  Activities  : {extracted.get('activity_preferences')}",
+        ]
         if warning:
-            print(f"  ⚠ BUDGET WARNING: {warning}")
+            lines.append(f"  ⚠ BUDGET WARNING: {warning}")
     else:
-        print(f"  Missing     : {', '.join(missing)}")
+        lines.append(f"  Missing     : {', '.join(missing)}")
         if clarification:
-            print(f"  Action      : {clarification}")
+            lines.append(f"  Action      : {clarification}")
 
-    print(
+    lines.append(
         f"  Tokens      : {meta.get('input_tokens')} in "
         f"/ {meta.get('output_tokens')} out"
     )
+    # Emit the whole block in one stdout write instead of a print call per line
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
@@ -239,7 +322,7 @@ def main() -> None:
     client = build_bedrock_client()
 
     try:
-        result = extract_travel_intent(client, user_input)
+        result = extract_travel_intent(client, user_input, stream=True)
     except ClientError as e:
         code = e.response["Error"]["Code"]
         message = e.response["Error"]["Message"]
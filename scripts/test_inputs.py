@@ -14,9 +14,11 @@ Usage:
 """
 
 import sys
+import threading
 import time
 import json
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
@@ -110,6 +112,7 @@ def check_result(result: dict, test: dict) -> bool:
 
     got_status = result.get("status")
     got_missing = result.get("missing_fields", [])
+    got_missing_set = set(got_missing)
 
     passed = True
 
@@ -120,7 +123,7 @@ def check_result(result: dict, test: dict) -> bool:
         print(f"  ✓ Status: {got_status}")
 
     for field in expected_missing:
-        if field not in got_missing:
+        if field not in got_missing_set:
             print(f"  ✗ Expected '{field}' in missing_fields, got {got_missing}")
             passed = False
         else:
@@ -137,6 +140,77 @@ def check_result(result: dict, test: dict) -> bool:
     return passed
 
 
+# Concurrent Bedrock calls per batch — kept well under the model's on-demand request quota
+MAX_WORKERS = 4
+
+# Sustained call rate for the batches; raise it if your account's Haiku quota allows
+REQUESTS_PER_SECOND = 2
+
+
+class TokenBucket:
+    """Thread-safe token bucket: bursts up to `capacity` calls, then `rate_per_sec` sustained."""
+
+    def __init__(self, rate_per_sec: float, capacity: int):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+bucket = TokenBucket(REQUESTS_PER_SECOND, capacity=MAX_WORKERS)
+
+
+def fetch_outcome(client: boto3.client, test: dict) -> dict:
+    """Make one test's Bedrock call(s) and return the outcome.
+
+    Runs on a worker thread, so nothing is printed here; retry notes are collected and
+    run_batch prints everything in the original test order.
+    """
+    notes = []
+
+    if "override_model" in test:
+        bucket.acquire()
+        try:
+            client.converse(
+                modelId=test["override_model"],
+                messages=[{"role": "user", "content": [{"text": test["input"]}]}],
+                inferenceConfig={"maxTokens": 100},
+            )
+            return {"kind": "unexpected_success", "notes": notes}
+        except ClientError as e:
+            return {"kind": "client_error", "error": e, "notes": notes}
+
+    for attempt in range(1, 4):
+        bucket.acquire()
+        try:
+            result = extract_travel_intent(client, test["input"])
+            return {"kind": "result", "result": result, "notes": notes}
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ThrottlingException" and attempt < 3:
+                wait = 10 * attempt
+                notes.append(f"  ⏳ ThrottlingException — waiting {wait}s before retry {attempt}/2...")
+                time.sleep(wait)
+            else:
+                return {"kind": "client_error", "error": e, "notes": notes}
+        except json.JSONDecodeError as e:
+            return {"kind": "json_error", "error": e, "notes": notes}
+
+
 def run_batch(client: boto3.client, tests: list[dict], batch_name: str) -> tuple[int, int]:
     passed_count = 0
     total = len(tests)
@@ -145,50 +219,36 @@ def run_batch(client: boto3.client, tests: list[dict], batch_name: str) -> tuple
     print(f"  {batch_name.upper()} ({total} test{'s' if total != 1 else ''})")
     print(f"{'='*60}")
 
-    for i, test in enumerate(tests, 1):
-        print(f"\n[{i}/{total}] {test['label']}")
-
-        if "override_model" in test:
-            bad_model = test["override_model"]
-            print(f"  Deliberately using wrong model ID: {bad_model}")
-            try:
-                response = client.converse(
-                    modelId=bad_model,
-                    messages=[{"role": "user", "content": [{"text": test["input"]}]}],
-                    inferenceConfig={"maxTokens": 100},
-                )
-                print("  ✗ Expected an error but got a response — model ID was valid?")
-            except ClientError as e:
-                code = e.response["Error"]["Code"]
-                message = e.response["Error"]["Message"]
-                print(f"  ✓ Got expected ClientError: {code}")
-                print(f"    Message: {message}")
-                passed_count += 1
-            time.sleep(3)
-            continue
-
-        for attempt in range(1, 4):
-            try:
-                result = extract_travel_intent(client, test["input"])
-                print_result(test["input"], result)
-                if check_result(result, test):
-                    passed_count += 1
-                break
-            except ClientError as e:
-                code = e.response["Error"]["Code"]
-                if code == "ThrottlingException" and attempt < 3:
-                    wait = 10 * attempt
-                    print(f"  ⏳ ThrottlingException — waiting {wait}s before retry {attempt}/2...")
-                    time.sleep(wait)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(fetch_outcome, client, test) for test in tests]
+
+        # Report in the original order; later tests keep running while earlier ones print
+        for i, (test, future) in enumerate(zip(tests, futures), 1):
+            outcome = future.result()
+            print(f"\n[{i}/{total}] {test['label']}")
+            for note in outcome["notes"]:
+                print(note)
+
+            if "override_model" in test:
+                print(f"  Deliberately using wrong model ID: {test['override_model']}")
+                if outcome["kind"] == "unexpected_success":
+                    print("  ✗ Expected an error but got a response — model ID was valid?")
                 else:
-                    print(f"  ✗ Unexpected ClientError: {code} — {e.response['Error']['Message']}")
-                    break
-            except json.JSONDecodeError as e:
-                print(f"  ✗ JSONDecodeError: {e}")
-                break
+                    error = outcome["error"].response["Error"]
+                    print(f"  ✓ Got expected ClientError: {error['Code']}")
+                    print(f"    Message: {error['Message']}")
+                    passed_count += 1
+                continue
 
-        if i < total:
-            time.sleep(3)
+            if outcome["kind"] == "result":
+                print_result(test["input"], outcome["result"])
+                if check_result(outcome["result"], test):
+                    passed_count += 1
+            elif outcome["kind"] == "client_error":
+                error = outcome["error"].response["Error"]
+                print(f"  ✗ Unexpected ClientError: {error['Code']} — {error['Message']}")
+            else:
+                print(f"  ✗ JSONDecodeError: {outcome['error']}")
 
     return passed_count, total
 